@@ -7,6 +7,9 @@ Date: July 31, 2025
 Controls coolant temperature for Inverter and DC-DC converter
 """
 
+import collections
+import os
+import sys
 import time
 import threading
 from enum import Enum, auto
@@ -22,8 +25,41 @@ class SystemState(Enum):
     EMERGENCY_STOP = auto()
 
 
+# State values as plain ints for the control loop's table dispatch
+S_OFF, S_INIT, S_RUN, S_ERR, S_ES = (state.value for state in SystemState)
+
+# The GIL switch interval is process-wide, so it is shortened when the
+# first controller starts and restored when the last one stops
+_switch_lock = threading.Lock()
+_switch_users = 0
+_saved_switch_interval = None
+
+
+def _acquire_switch_interval(interval: float):
+    """Shorten the GIL switch interval for one running controller"""
+    global _switch_users, _saved_switch_interval
+    with _switch_lock:
+        if _switch_users == 0:
+            _saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(interval)
+        _switch_users += 1
+
+
+def _release_switch_interval():
+    """Restore the GIL switch interval once no controller is running"""
+    global _switch_users, _saved_switch_interval
+    with _switch_lock:
+        _switch_users -= 1
+        if _switch_users == 0:
+            sys.setswitchinterval(_saved_switch_interval)
+            _saved_switch_interval = None
+
+
 @dataclass
 class SensorData:
+    # Explicit __slots__ (dataclass(slots=True) needs Python 3.10)
+    __slots__ = ("temperature", "level_switch", "ignition")
+
     temperature: float
     level_switch: bool
     ignition: bool
@@ -31,6 +67,8 @@ class SensorData:
 
 @dataclass
 class ControlOutputs:
+    __slots__ = ("pump_on", "fan_on", "fan_speed")
+
     pump_on: bool
     fan_on: bool
     fan_speed: int  # 0-100%
@@ -46,10 +84,24 @@ class CoolingController:
 
         # Fan control thresholds
         self.FAN_START_TEMP = 60.0
+        self.FAN_STOP_TEMP = self.FAN_START_TEMP - 5.0  # 5°C hysteresis
         self.FAN_MAX_TEMP = 80.0
 
-        # System state
-        self.state = SystemState.OFF
+        # Control loop period (seconds). States waiting on an external
+        # event poll faster to cut reaction latency.
+        self.LOOP_PERIOD = 0.1
+        self.FAST_LOOP_PERIOD = 0.02
+
+        # Control thread scheduling (SCHED_FIFO priority, nice fallback)
+        self.RT_PRIORITY = 20
+        self.NICE_FALLBACK = -10
+
+        # GIL switch interval while running (seconds). Bounds how long the
+        # control thread waits for the interpreter after waking up.
+        self.GIL_SWITCH_INTERVAL = 0.001
+
+        # System state, held as a raw SystemState value (see state property)
+        self._state = S_OFF
         self.sensors = SensorData(25.0, True, False)
         self.outputs = ControlOutputs(False, False, 0)
 
@@ -62,92 +114,210 @@ class CoolingController:
         self.low_level_time = None
         self.over_temp_time = None
 
-        # Thread control
-        self.running = False
+        # Thread control. The stop event doubles as the loop's sleep
+        # primitive so stop() wakes the thread immediately.
+        self._stop_evt = threading.Event()
+        self._stop_evt.set()
         self.control_thread = None
+        self._holds_switch_interval = False
+
+        # Diagnostics queue drained by the logger thread so the control
+        # loop never blocks on stdout. Oldest messages drop on overflow.
+        self._log_q = collections.deque(maxlen=256)
+        self._log_evt = threading.Event()
+        self._log_thread = None
+        self._logging = False
+
+        # State handlers indexed by SystemState value (values start at 1)
+        self._handlers = (
+            None,
+            self._handle_off_state,
+            self._handle_init_state,
+            self._handle_running_state,
+            self._handle_error_state,
+            self._handle_emergency_state,
+        )
+
+        # Loop period per state, indexed like _handlers
+        fast, slow = self.FAST_LOOP_PERIOD, self.LOOP_PERIOD
+        self._periods = (None, fast, fast, slow, slow, fast)
 
     def start(self):
         """Start the control system"""
-        self.running = True
+        self._logging = True
+        self._log_thread = threading.Thread(target=self._log_loop,
+                                            daemon=True)
+        self._log_thread.start()
+
+        self._stop_evt.clear()
+        _acquire_switch_interval(self.GIL_SWITCH_INTERVAL)
+        self._holds_switch_interval = True
         self.control_thread = threading.Thread(target=self._control_loop)
         self.control_thread.start()
+        self._elevate_thread_priority(self.control_thread.native_id)
         print("Cooling control system started")
 
     def stop(self):
         """Stop the control system"""
-        self.running = False
+        self._stop_evt.set()
         if self.control_thread:
             self.control_thread.join()
+        if self._holds_switch_interval:
+            _release_switch_interval()
+            self._holds_switch_interval = False
+        if self._log_thread:
+            self._logging = False
+            self._log_evt.set()
+            self._log_thread.join()
+            self._log_thread = None
         self._shutdown_system()
         print("Cooling control system stopped")
 
+    @property
+    def state(self) -> SystemState:
+        """Current system state"""
+        return SystemState(self._state)
+
+    @state.setter
+    def state(self, state: SystemState):
+        self._state = state.value
+
+    @property
+    def running(self) -> bool:
+        """True between start() and stop()"""
+        return not self._stop_evt.is_set()
+
+    def _elevate_thread_priority(self, tid: int) -> bool:
+        """Run the control thread ahead of logging and demo threads.
+
+        Tries SCHED_FIFO first, then a negative nice value (Linux only).
+        Both need elevated privileges; without them the loop keeps default
+        priority.
+        """
+        # Only Linux applies these calls to a single thread when given a
+        # thread id; other platforms would take the id as a pid
+        if sys.platform.startswith("linux"):
+            try:
+                os.sched_setscheduler(tid, os.SCHED_FIFO,
+                                      os.sched_param(self.RT_PRIORITY))
+                return True
+            except OSError:
+                pass
+
+            try:
+                os.setpriority(os.PRIO_PROCESS, tid, self.NICE_FALLBACK)
+                return True
+            except OSError:
+                pass
+
+        print("Real-time priority unavailable - using default scheduling")
+        return False
+
+    def _log(self, message: str):
+        """Queue a diagnostic message (printed directly when not started)"""
+        if self._log_thread is None:
+            print(message)
+            return
+        self._log_q.append(message)
+        self._log_evt.set()
+
+    def _log_loop(self):
+        """Drain queued diagnostics to stdout until stopped"""
+        queue = self._log_q
+        while True:
+            self._log_evt.wait()
+            self._log_evt.clear()
+            while queue:
+                sys.stdout.write(queue.popleft() + "\n")
+            sys.stdout.flush()
+            if not self._logging:
+                break
+
     def update_sensors(self, temperature: float, level_switch: bool,
                        ignition: bool):
-        """Update sensor readings"""
-        self.sensors.temperature = temperature
-        self.sensors.level_switch = level_switch
-        self.sensors.ignition = ignition
+        """Update sensor readings.
+
+        Publishes a new SensorData snapshot with a single reference store,
+        so the control thread never sees a mix of old and new fields.
+        Updates arriving between ticks coalesce; the loop sees the latest.
+        """
+        self.sensors = SensorData(temperature, level_switch, ignition)
 
     def _control_loop(self):
-        """Main control loop running at 10Hz"""
-        while self.running:
-            # State machine logic
-            if self.state == SystemState.OFF:
-                self._handle_off_state()
-            elif self.state == SystemState.INITIALIZING:
-                self._handle_init_state()
-            elif self.state == SystemState.RUNNING:
-                self._handle_running_state()
-            elif self.state == SystemState.ERROR:
-                self._handle_error_state()
-            elif self.state == SystemState.EMERGENCY_STOP:
-                self._handle_emergency_state()
-
-            # Sleep for 100ms (10Hz update rate)
-            time.sleep(0.1)
-
-    def _handle_off_state(self):
+        """Main control loop running at 10Hz (50Hz while awaiting events)"""
+        # Absolute deadlines on the monotonic clock so handler runtime does
+        # not accumulate as drift
+        next_tick = time.monotonic()
+        handlers = self._handlers
+        periods = self._periods
+        stop_evt = self._stop_evt
+        while not stop_evt.is_set():
+            # State machine logic, with one clock read shared by all checks
+            now = time.monotonic()
+            handlers[self._state](now)
+
+            # Sleep until the next deadline: 100ms (10Hz) while RUNNING or
+            # in ERROR, 20ms (50Hz) in OFF, INITIALIZING and EMERGENCY_STOP
+            next_tick += periods[self._state]
+            remaining = next_tick - time.monotonic()
+            if remaining > 0:
+                stop_evt.wait(remaining)
+            else:
+                # Overran the deadline - drop the frame and resynchronize
+                next_tick = time.monotonic()
+
+    def _handle_off_state(self, now: Optional[float] = None):
         """Handle system in OFF state"""
         self.outputs.pump_on = False
         self.outputs.fan_on = False
         self.outputs.fan_speed = 0
 
         if self.sensors.ignition:
-            print("Ignition ON - Starting initialization")
-            self.state = SystemState.INITIALIZING
+            self._log("Ignition ON - Starting initialization")
+            self._state = S_INIT
 
-    def _handle_init_state(self):
+    def _handle_init_state(self, now: Optional[float] = None):
         """Handle system initialization"""
+        if now is None:
+            now = time.monotonic()
+
         # Check coolant level
         if not self.sensors.level_switch:
-            print("ERROR: Low coolant level detected")
-            self.state = SystemState.ERROR
+            self._log("ERROR: Low coolant level detected")
+            self._state = S_ERR
             return
 
         # Start pump
-        self.outputs.pump_on = True
-        self.pump_start_time = time.time()
+        if not self.outputs.pump_on:
+            self.outputs.pump_on = True
+            self.pump_start_time = now
 
         # Wait for circulation (2 seconds)
-        if time.time() - self.pump_start_time > 2.0:
-            print("Initialization complete - System running")
-            self.state = SystemState.RUNNING
+        if now - self.pump_start_time > 2.0:
+            self._log("Initialization complete - System running")
+            self._state = S_RUN
 
-    def _handle_running_state(self):
+    def _handle_running_state(self, now: Optional[float] = None):
         """Handle normal running state"""
-        if not self.sensors.ignition:
-            print("Ignition OFF - Shutting down")
-            self.state = SystemState.OFF
+        if now is None:
+            now = time.monotonic()
+
+        # One sensor snapshot for the whole tick
+        sensors = self.sensors
+
+        if not sensors.ignition:
+            self._log("Ignition OFF - Shutting down")
+            self._state = S_OFF
             return
 
         # Safety checks
-        if not self._perform_safety_checks():
+        if not self._perform_safety_checks(now, sensors):
             return
 
         # Temperature control
-        self._control_temperature()
+        self._control_temperature(now, sensors)
 
-    def _handle_error_state(self):
+    def _handle_error_state(self, now: Optional[float] = None):
         """Handle error conditions"""
         # Shut down pump and fan
         self.outputs.pump_on = False
@@ -155,15 +325,16 @@ class CoolingController:
         self.outputs.fan_speed = 0
 
         # Check if error condition cleared
-        temp_ok = self.sensors.temperature < self.TEMP_MAX
-        if self.sensors.level_switch and temp_ok:
-            if self.sensors.ignition:
-                print("Error cleared - Restarting system")
-                self.state = SystemState.INITIALIZING
+        sensors = self.sensors
+        temp_ok = sensors.temperature < self.TEMP_MAX
+        if sensors.level_switch and temp_ok:
+            if sensors.ignition:
+                self._log("Error cleared - Restarting system")
+                self._state = S_INIT
             else:
-                self.state = SystemState.OFF
+                self._state = S_OFF
 
-    def _handle_emergency_state(self):
+    def _handle_emergency_state(self, now: Optional[float] = None):
         """Handle emergency shutdown"""
         # Run fan at max speed even with pump off
         self.outputs.pump_on = False
@@ -172,59 +343,74 @@ class CoolingController:
 
         # Check if temperature reduced
         if self.sensors.temperature < self.TEMP_MAX:
-            print("Temperature reduced - Attempting recovery")
-            self.state = SystemState.ERROR
+            self._log("Temperature reduced - Attempting recovery")
+            self._state = S_ERR
 
-    def _perform_safety_checks(self) -> bool:
+    def _perform_safety_checks(self, now: Optional[float] = None,
+                               sensors: Optional[SensorData] = None) -> bool:
         """Perform safety checks, return False if unsafe"""
+        if sensors is None:
+            sensors = self.sensors
+        temp = sensors.temperature
+        level_ok = sensors.level_switch
+
+        # Healthy case first: level OK and not over temperature
+        if level_ok and temp <= self.TEMP_MAX:
+            self.low_level_time = None
+            self.over_temp_time = None
+            return True
+
+        if now is None:
+            now = time.monotonic()
+
         # Check coolant level
-        if not self.sensors.level_switch:
+        if not level_ok:
             if self.low_level_time is None:
-                self.low_level_time = time.time()
-            elif time.time() - self.low_level_time > 3.0:  # 3s grace
-                print("ERROR: Coolant level low for >3 seconds")
-                self.state = SystemState.ERROR
+                self.low_level_time = now
+            elif now - self.low_level_time > 3.0:  # 3s grace
+                self._log("ERROR: Coolant level low for >3 seconds")
+                self._state = S_ERR
                 return False
         else:
             self.low_level_time = None
 
-        # Check critical temperature
-        if self.sensors.temperature > self.TEMP_CRITICAL:
-            temp = self.sensors.temperature
-            print(f"CRITICAL: Temperature {temp}°C exceeds limit")
-            self.state = SystemState.EMERGENCY_STOP
-            return False
-
-        # Check over-temperature condition
-        if self.sensors.temperature > self.TEMP_MAX:
-            if self.over_temp_time is None:
-                self.over_temp_time = time.time()
-            elif time.time() - self.over_temp_time > 10.0:  # 10 second limit
-                print("ERROR: Over-temperature for >10 seconds")
-                self.state = SystemState.ERROR
-                return False
-        else:
+        # Check temperature, most common case first
+        if temp <= self.TEMP_MAX:
             self.over_temp_time = None
+        elif temp > self.TEMP_CRITICAL:
+            self._log(f"CRITICAL: Temperature {temp}°C exceeds limit")
+            self._state = S_ES
+            return False
+        elif self.over_temp_time is None:
+            self.over_temp_time = now
+        elif now - self.over_temp_time > 10.0:  # 10 second limit
+            self._log("ERROR: Over-temperature for >10 seconds")
+            self._state = S_ERR
+            return False
 
         return True
 
-    def _control_temperature(self):
+    def _control_temperature(self, now: Optional[float] = None,
+                             sensors: Optional[SensorData] = None):
         """Main temperature control logic"""
-        temp = self.sensors.temperature
+        if sensors is None:
+            sensors = self.sensors
+        temp = sensors.temperature
+        outputs = self.outputs
 
         # Pump control (always on when running)
-        self.outputs.pump_on = True
+        outputs.pump_on = True
 
         # Fan control with hysteresis
         if temp > self.FAN_START_TEMP:
-            self.outputs.fan_on = True
+            outputs.fan_on = True
 
             # PID control for fan speed
-            self.outputs.fan_speed = self.pid.calculate(temp)
+            outputs.fan_speed = self.pid.calculate(temp, now)
 
-        elif temp < (self.FAN_START_TEMP - 5.0):  # 5°C hysteresis
-            self.outputs.fan_on = False
-            self.outputs.fan_speed = 0
+        elif temp < self.FAN_STOP_TEMP:
+            outputs.fan_on = False
+            outputs.fan_speed = 0
             self.pid.reset()
 
     def _shutdown_system(self):
@@ -232,7 +418,59 @@ class CoolingController:
         self.outputs.pump_on = False
         self.outputs.fan_on = False
         self.outputs.fan_speed = 0
-        self.state = SystemState.OFF
+        self._state = S_OFF
+
+
+# PID state vector layout: [integral, last_error, last_time]
+PID_INTEGRAL = 0
+PID_LAST_ERROR = 1
+PID_LAST_TIME = 2
+
+
+def _pid_step(state, kp, ki, kd, setpoint, current_value, now):
+    """Advance PID state by one sample and return the output (0-100%).
+
+    A NaN measurement fails safe to full fan speed and leaves the state
+    untouched, so one bad sample cannot poison the integral.
+    """
+    if current_value != current_value:  # NaN
+        return 100
+
+    dt = now - state[PID_LAST_TIME]
+
+    error = current_value - setpoint
+
+    # Proportional term
+    p_term = kp * error
+
+    # Integral term with anti-windup
+    integral = state[PID_INTEGRAL] + error * dt
+    if integral > 50.0:  # Limit integral
+        integral = 50.0
+    elif integral < -50.0:
+        integral = -50.0
+    i_term = ki * integral
+
+    # Derivative term
+    d_term = kd * (error - state[PID_LAST_ERROR]) / dt if dt > 0 else 0.0
+
+    # Calculate output
+    output = p_term + i_term + d_term
+
+    # Update state
+    state[PID_INTEGRAL] = integral
+    state[PID_LAST_ERROR] = error
+    state[PID_LAST_TIME] = now
+
+    # Clamp output to 0-100% before converting, so out-of-range values
+    # never reach int(); a NaN output fails safe to full speed
+    if output >= 100.0:
+        return 100
+    if output <= 0.0:
+        return 0
+    if output != output:  # NaN
+        return 100
+    return int(output)
 
 
 class PIDController:
@@ -243,43 +481,46 @@ class PIDController:
         self.kd = kd
         self.setpoint = setpoint
 
-        self.integral = 0.0
-        self.last_error = 0.0
-        self.last_time = time.time()
+        self._state = [0.0, 0.0, time.monotonic()]
 
-    def calculate(self, current_value: float) -> int:
-        """Calculate PID output (0-100%)"""
-        current_time = time.time()
-        dt = current_time - self.last_time
-
-        error = current_value - self.setpoint
+    @property
+    def integral(self) -> float:
+        return self._state[PID_INTEGRAL]
 
-        # Proportional term
-        p_term = self.kp * error
+    @integral.setter
+    def integral(self, value: float):
+        self._state[PID_INTEGRAL] = value
 
-        # Integral term with anti-windup
-        self.integral += error * dt
-        self.integral = max(-50, min(50, self.integral))  # Limit integral
-        i_term = self.ki * self.integral
+    @property
+    def last_error(self) -> float:
+        return self._state[PID_LAST_ERROR]
 
-        # Derivative term
-        d_term = self.kd * (error - self.last_error) / dt if dt > 0 else 0
+    @last_error.setter
+    def last_error(self, value: float):
+        self._state[PID_LAST_ERROR] = value
 
-        # Calculate output
-        output = p_term + i_term + d_term
+    @property
+    def last_time(self) -> float:
+        return self._state[PID_LAST_TIME]
 
-        # Update state
-        self.last_error = error
-        self.last_time = current_time
+    @last_time.setter
+    def last_time(self, value: float):
+        self._state[PID_LAST_TIME] = value
 
-        # Clamp output to 0-100%
-        return max(0, min(100, int(output)))
+    def calculate(self, current_value: float,
+                  now: Optional[float] = None) -> int:
+        """Calculate PID output (0-100%)"""
+        if now is None:
+            now = time.monotonic()
+        return _pid_step(self._state, self.kp, self.ki, self.kd,
+                         self.setpoint, current_value, now)
 
     def reset(self):
         """Reset controller state"""
-        self.integral = 0.0
-        self.last_error = 0.0
-        self.last_time = time.time()
+        state = self._state
+        state[PID_INTEGRAL] = 0.0
+        state[PID_LAST_ERROR] = 0.0
+        state[PID_LAST_TIME] = time.monotonic()
 
 
 def main():
@@ -300,11 +541,13 @@ def main():
 
         # Simulate temperature rise
         print("\n[t=3s] Temperature rising...")
-        for temp in range(25, 70, 5):
-            controller.update_sensors(float(temp), True, True)
-            print(f"Temp: {temp}°C, Pump: {controller.outputs.pump_on}, "
-                  f"Fan: {controller.outputs.fan_on}, "
-                  f"Fan Speed: {controller.outputs.fan_speed}%")
+        ramp = [float(temp) for temp in range(25, 70, 5)]
+        outputs = controller.outputs
+        for temp in ramp:
+            controller.update_sensors(temp, True, True)
+            print(f"Temp: {temp:.0f}°C, Pump: {outputs.pump_on}, "
+                  f"Fan: {outputs.fan_on}, "
+                  f"Fan Speed: {outputs.fan_speed}%")
             time.sleep(1)
 
         # Simulate steady state
@@ -43,6 +43,34 @@ def test_pid_controller():
     assert pid.integral == 0.0
     assert pid.last_error == 0.0
 
+def test_pid_integral_limit():
+    """Test PID anti-windup and output clamping"""
+    pid = PIDController(kp=2.5, ki=0.5, kd=0.1, setpoint=65.0)
+
+    # Large error over a long interval saturates the integral
+    pid.last_time -= 100.0
+    assert pid.calculate(95.0) == 100
+    assert pid.integral == 50.0
+
+    pid.last_time -= 100.0
+    assert pid.calculate(25.0) == 0
+    assert pid.integral == -50.0
+
+def test_pid_invalid_input():
+    """Test PID fail-safe handling of NaN and out-of-range inputs"""
+    pid = PIDController(kp=2.5, ki=0.5, kd=0.1, setpoint=65.0)
+    now = pid.last_time
+
+    assert pid.calculate(70.0, now + 0.1) > 0
+    integral = pid.integral
+
+    # NaN fails safe to full speed without touching the PID state
+    assert pid.calculate(float("nan"), now + 0.2) == 100
+    assert pid.integral == integral
+
+    assert pid.calculate(1e300, now + 0.3) == 100
+    assert pid.calculate(-1e300, now + 0.4) == 0
+
 def test_cooling_controller_init():
     """Test CoolingController initialization"""
     controller = CoolingController()
@@ -76,6 +104,14 @@ def test_sensor_update():
     assert controller.sensors.level_switch == False
     assert controller.sensors.ignition == True
 
+    # A snapshot held by the reader is never modified by later updates
+    snapshot = controller.sensors
+    controller.update_sensors(80.0, True, False)
+    assert snapshot.temperature == 70.0
+    assert snapshot.level_switch == False
+    assert snapshot.ignition == True
+    assert controller.sensors.temperature == 80.0
+
 def test_state_transitions():
     """Test basic state transition logic"""
     controller = CoolingController()
@@ -97,6 +133,188 @@ def test_state_transitions():
     controller.state = SystemState.ERROR
     assert controller.state == SystemState.ERROR
 
+def test_handler_table():
+    """Test that every state dispatches to its own handler"""
+    controller = CoolingController()
+    expected = {
+        SystemState.OFF: controller._handle_off_state,
+        SystemState.INITIALIZING: controller._handle_init_state,
+        SystemState.RUNNING: controller._handle_running_state,
+        SystemState.ERROR: controller._handle_error_state,
+        SystemState.EMERGENCY_STOP: controller._handle_emergency_state,
+    }
+    for state, handler in expected.items():
+        assert controller._handlers[state.value] == handler
+
+def test_period_table():
+    """Test that states waiting on external events poll faster"""
+    from cooling_control import S_OFF, S_INIT, S_RUN, S_ERR, S_ES
+    controller = CoolingController()
+    assert controller.FAST_LOOP_PERIOD < controller.LOOP_PERIOD
+
+    assert controller._periods[S_OFF] == controller.FAST_LOOP_PERIOD
+    assert controller._periods[S_INIT] == controller.FAST_LOOP_PERIOD
+    assert controller._periods[S_ES] == controller.FAST_LOOP_PERIOD
+    assert controller._periods[S_RUN] == controller.LOOP_PERIOD
+    assert controller._periods[S_ERR] == controller.LOOP_PERIOD
+
+def test_init_warmup_timer():
+    """Test that the pump warmup timer is not restarted every tick"""
+    controller = CoolingController()
+    controller.state = SystemState.INITIALIZING
+    controller.update_sensors(25.0, True, True)
+
+    controller._handle_init_state()
+    assert controller.outputs.pump_on == True
+    start = controller.pump_start_time
+
+    controller._handle_init_state()
+    assert controller.pump_start_time == start
+    assert controller.state == SystemState.INITIALIZING
+
+    # Backdate the start time past the 2 second circulation period
+    controller.pump_start_time = time.monotonic() - 2.5
+    controller._handle_init_state()
+    assert controller.state == SystemState.RUNNING
+
+def test_safety_timers():
+    """Test low-level and over-temperature grace periods"""
+    controller = CoolingController()
+    controller.state = SystemState.RUNNING
+
+    # Low coolant level trips after 3 seconds
+    controller.update_sensors(65.0, False, True)
+    assert controller._perform_safety_checks(now=100.0) == True
+    assert controller._perform_safety_checks(now=102.9) == True
+    assert controller._perform_safety_checks(now=103.1) == False
+    assert controller.state == SystemState.ERROR
+
+    # Over-temperature trips after 10 seconds
+    controller.state = SystemState.RUNNING
+    controller.update_sensors(80.0, True, True)
+    assert controller._perform_safety_checks(now=200.0) == True
+    assert controller.low_level_time is None
+    assert controller._perform_safety_checks(now=209.9) == True
+    assert controller._perform_safety_checks(now=210.1) == False
+    assert controller.state == SystemState.ERROR
+
+    # A healthy reading clears both timers
+    controller = CoolingController()
+    controller.state = SystemState.RUNNING
+    controller.update_sensors(80.0, False, True)
+    assert controller._perform_safety_checks(now=250.0) == True
+    assert controller.low_level_time == 250.0
+    assert controller.over_temp_time == 250.0
+    controller.update_sensors(65.0, True, True)
+    assert controller._perform_safety_checks(now=251.0) == True
+    assert controller.low_level_time is None
+    assert controller.over_temp_time is None
+
+    # Critical temperature trips immediately
+    controller.state = SystemState.RUNNING
+    controller.update_sensors(90.0, True, True)
+    assert controller._perform_safety_checks(now=300.0) == False
+    assert controller.state == SystemState.EMERGENCY_STOP
+
+def test_running_tick_uses_one_snapshot():
+    """Test that a mid-tick sensor update does not reach the PID"""
+    controller = CoolingController()
+    controller.state = SystemState.RUNNING
+    controller.update_sensors(70.0, True, True)
+
+    # Publish a new snapshot right after the safety checks have run
+    checks = controller._perform_safety_checks
+    def checks_then_update(now=None, sensors=None):
+        result = checks(now, sensors)
+        controller.update_sensors(90.0, True, True)
+        return result
+    controller._perform_safety_checks = checks_then_update
+
+    seen = []
+    calculate = controller.pid.calculate
+    def record(value, now=None):
+        seen.append(value)
+        return calculate(value, now)
+    controller.pid.calculate = record
+
+    controller._handle_running_state(now=100.0)
+    assert seen == [70.0]
+    assert controller.state == SystemState.RUNNING
+
+def test_fan_hysteresis():
+    """Test fan on/off hysteresis around FAN_START_TEMP"""
+    controller = CoolingController()
+    assert controller.FAN_STOP_TEMP == controller.FAN_START_TEMP - 5.0
+
+    controller.update_sensors(70.0, True, True)
+    controller._control_temperature()
+    assert controller.outputs.pump_on == True
+    assert controller.outputs.fan_on == True
+
+    # Inside the hysteresis band the fan keeps running
+    controller.update_sensors(57.0, True, True)
+    controller._control_temperature()
+    assert controller.outputs.fan_on == True
+
+    controller.update_sensors(54.0, True, True)
+    controller._control_temperature()
+    assert controller.outputs.fan_on == False
+    assert controller.outputs.fan_speed == 0
+
+def test_start_stop():
+    """Test that the control thread starts and stops cleanly"""
+    interval = sys.getswitchinterval()
+    controller = CoolingController()
+
+    assert controller.running == False
+    controller.start()
+    assert controller.running == True
+    assert controller.control_thread.is_alive()
+    assert sys.getswitchinterval() == controller.GIL_SWITCH_INTERVAL
+
+    # Put the loop into its 100ms period; stop() must not wait it out
+    controller.update_sensors(25.0, False, False)
+    controller.state = SystemState.ERROR
+    time.sleep(0.15)
+    start = time.monotonic()
+    controller.stop()
+    assert time.monotonic() - start < 0.05
+    assert controller.running == False
+    assert not controller.control_thread.is_alive()
+    assert controller.state == SystemState.OFF
+    assert sys.getswitchinterval() == interval
+
+def test_switch_interval_shared():
+    """Test that the GIL switch interval is restored by the last stop()"""
+    interval = sys.getswitchinterval()
+    a = CoolingController()
+    b = CoolingController()
+
+    a.start()
+    b.start()
+    a.stop()
+    assert sys.getswitchinterval() == b.GIL_SWITCH_INTERVAL
+
+    b.stop()
+    assert sys.getswitchinterval() == interval
+
+    # A second stop() must not release the interval again
+    b.stop()
+    assert sys.getswitchinterval() == interval
+
+def test_diagnostics_flushed_on_stop(capsys):
+    """Test that queued diagnostics are written before stop() returns"""
+    controller = CoolingController()
+    controller.update_sensors(25.0, True, True)
+
+    controller.start()
+    time.sleep(0.2)
+    controller.stop()
+
+    out = capsys.readouterr().out
+    assert "Ignition ON - Starting initialization" in out
+    assert out.index("Ignition ON") < out.index("system stopped")
+
 def test_data_classes():
     """Test dataclass functionality"""
     # Test SensorData